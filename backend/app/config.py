@@ -17,6 +17,10 @@ class Settings(BaseSettings):
     # Anthropic API
     ANTHROPIC_API_KEY: str = ""
     
+    # In-memory state expiry (seconds since last update)
+    SESSION_TTL_SECONDS: int = 86400
+    TASK_TTL_SECONDS: int = 3600
+    
     # CORS settings
     CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
     
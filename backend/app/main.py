@@ -1,34 +1,84 @@
 """Main FastAPI application."""
 import asyncio
+import hashlib
+import logging
+import re
 from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Dict, Any
 from uuid import uuid4
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
+import orjson
+from cachetools import TTLCache
+from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
 from .config import get_settings
 from .models import (
     ProjectCreate, Project, SpecificationUpdate, SuggestionRequest,
-    GenerateRequest, PullRequestCreate, HealthResponse, TaskStatus, Task
+    GenerateRequest, PullRequestCreate, HealthResponse, Task
 )
-from .services.github_client import GitHubApiClient
+from .services.github_client import GitHubApiClient, GitHubNotFound, GitHubRateLimit, close_shared_client
 from .services.anthropic_service import AnthropicService
 from .services.openspec_service import OpenSpecService
 from .services.claude_task_client import ClaudeTaskClient
 
-# In-memory storage
-user_sessions: Dict[str, Dict[str, Any]] = {}
-task_manager: Dict[str, Dict[str, Any]] = {}
+logger = logging.getLogger(__name__)
+
+# Characters not allowed in branch names / change IDs
+_SANITIZE_RE = re.compile(r'[^a-zA-Z0-9]')
+_SANITIZE_RE_ID = re.compile(r'[^a-zA-Z0-9-_]')
+
+# Blob digests of stored uploads (see OpenSpecService.store_upload and blob_path)
+_ZIP_DIGEST_RE = re.compile(r'[0-9a-f]{32}')
+
+# Error flagged on spec nodes whose uploaded markdown can't be decoded
+UNREADABLE_SPEC_ERROR = "Specification is not valid UTF-8 text"
+
+# Agent task polling interval bounds (seconds)
+POLL_MIN_DELAY = 1.0
+POLL_MAX_DELAY = 15.0
+
+# Maximum number of files sent in a single push-changes request
+PUSH_BATCH_SIZE = 100
 
-# Services
 settings = get_settings()
+
+# In-memory storage (entries expire TTL seconds after they were last written)
+user_sessions: TTLCache = TTLCache(maxsize=1000, ttl=settings.SESSION_TTL_SECONDS)
+task_manager: TTLCache = TTLCache(maxsize=10000, ttl=settings.TASK_TTL_SECONDS)
+
+# Services
 github_client: GitHubApiClient = None
 anthropic_service: AnthropicService = None
 openspec_service: OpenSpecService = None
 claude_task_client: ClaudeTaskClient = None
 
+# In-flight content decodes, keyed by (zipDigest, entry) (see load_spec_content)
+_content_loads: Dict[tuple, asyncio.Task] = {}
+
+
+async def sweep_expired_state(interval: float = 60.0):
+    """Periodically evict idle projects, finished tasks and unreferenced upload blobs."""
+    while True:
+        await asyncio.sleep(interval)
+        # A failed pass must not end the loop, or nothing would ever expire again
+        try:
+            user_sessions.expire()
+            task_manager.expire()
+            # Projects read their specs straight from the upload blob (contentRef),
+            # so live digests, not project links, keep blobs alive
+            live_project_ids = set(user_sessions.keys())
+            live_digests = {
+                project["openspecFile"].get("zipDigest")
+                for project in user_sessions.values()
+                if project.get("openspecFile")
+            }
+            await asyncio.to_thread(openspec_service.collect_garbage, live_project_ids, live_digests)
+        except Exception:
+            logger.exception("State sweep failed")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -36,16 +86,21 @@ async def lifespan(app: FastAPI):
     global github_client, anthropic_service, openspec_service, claude_task_client
     
     # Startup
+    # DEBUG only for this app's loggers; at root level it would also turn on
+    # httpx/httpcore/h2 header tracing and other library chatter
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger("app").setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
     github_client = GitHubApiClient(settings.GITHUB_API_ENDPOINT)
     anthropic_service = AnthropicService(settings.ANTHROPIC_API_KEY)
     openspec_service = OpenSpecService("./temp")
     claude_task_client = ClaudeTaskClient(settings.CLAUDE_TASK_ENDPOINT)
+    sweeper = asyncio.create_task(sweep_expired_state())
     
     yield
     
     # Shutdown
-    if github_client:
-        await github_client.close()
+    sweeper.cancel()
+    await close_shared_client()
     if claude_task_client:
         await claude_task_client.close()
 
@@ -54,6 +109,7 @@ app = FastAPI(
     title="OpenSpec Workflow API",
     description="API for managing OpenSpec files, generating AI suggestions, and triggering code generation",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -95,6 +151,188 @@ def update_spec_in_tree(nodes: list, spec_id: str, updates: Dict[str, Any]) -> b
     return False
 
 
+def build_spec_index(nodes: list) -> Dict[str, Dict[str, Any]]:
+    """Flatten a spec tree into an id -> node lookup."""
+    index = {}
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        index[node.get("id")] = node
+        if node.get("children"):
+            stack.extend(node["children"])
+    return index
+
+
+def mark_spec_tree_changed(project: Dict[str, Any]) -> None:
+    """Bump the spec revision so derived caches are rebuilt."""
+    project["_specRevision"] = project.get("_specRevision", 0) + 1
+    invalidate_project_json(project)
+
+
+def invalidate_project_json(project: Dict[str, Any]) -> None:
+    """Drop the cached get_project response after a mutation."""
+    project.pop("_jsonCache", None)
+
+
+def project_json(project: Dict[str, Any]) -> tuple[bytes, str]:
+    """Serialized get_project body and its ETag, cached until the next mutation."""
+    cached = project.get("_jsonCache")
+    if cached is None:
+        body = orjson.dumps({"success": True, "project": public_project(project)})
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        cached = project["_jsonCache"] = (body, etag)
+    return cached
+
+
+def find_spec(project: Dict[str, Any], spec_id: str) -> Dict[str, Any] | None:
+    """Find specification in a project via its id index."""
+    index = project.get("_specIndex")
+    if index is None:
+        index = project["_specIndex"] = build_spec_index(project.get("specTree", []))
+    return index.get(spec_id)
+
+
+def update_spec(project: Dict[str, Any], spec_id: str, updates: Dict[str, Any]) -> bool:
+    """Update specification in a project via its id index."""
+    spec = find_spec(project, spec_id)
+    if spec is None:
+        return False
+    spec.update(updates)
+    return True
+
+
+def mark_spec_unreadable(project: Dict[str, Any], spec: Dict[str, Any], content_ref: Dict[str, str]) -> None:
+    """Flag a spec whose uploaded entry is not valid UTF-8 (the eager extract left these out)."""
+    if spec.get("contentRef") is content_ref:
+        spec.pop("contentRef", None)
+        spec["error"] = UNREADABLE_SPEC_ERROR
+        invalidate_project_json(project)
+
+
+async def load_spec_content(project: Dict[str, Any], spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode a lazily extracted spec's markdown on first access and keep it on the node.
+    
+    Concurrent first reads of a node share one decode. An entry that can't be
+    decoded flags the node (see mark_spec_unreadable) and raises a 422.
+    """
+    if spec.get("error"):
+        raise HTTPException(status_code=422, detail=spec["error"])
+    
+    content_ref = spec.get("contentRef")
+    if not content_ref:
+        return spec
+    
+    key = (content_ref["zipDigest"], content_ref["entry"])
+    load = _content_loads.get(key)
+    if load is None:
+        load = asyncio.create_task(asyncio.to_thread(
+            openspec_service.read_entries,
+            content_ref["zipDigest"],
+            [content_ref["entry"]]
+        ))
+        _content_loads[key] = load
+        load.add_done_callback(lambda _: _content_loads.pop(key, None))
+    
+    try:
+        contents = await asyncio.shield(load)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Specification content not found")
+    content = contents.get(content_ref["entry"])
+    if content is None:
+        # The entry came from this zip's own listing, so it failed to decode
+        mark_spec_unreadable(project, spec, content_ref)
+        raise HTTPException(status_code=422, detail=UNREADABLE_SPEC_ERROR)
+    
+    # A save during the decode replaced the content (and dropped the ref); keep the save
+    if spec.get("contentRef") is content_ref:
+        spec["content"] = content
+        spec.pop("contentRef", None)
+        invalidate_project_json(project)
+    return spec
+
+
+def push_plan(project: Dict[str, Any]) -> tuple[str, list]:
+    """Derive the change ID and the (target path, node) pairs to push, cached per spec revision.
+    
+    Only node references are cached; contents are resolved per push so the
+    cache never pins decoded upload text.
+    """
+    revision = project.get("_specRevision", 0)
+    push_cache = project.get("_pushCache")
+    if push_cache and push_cache[0] == revision:
+        return push_cache[1], push_cache[2]
+    
+    # Determine Change ID from specTree (User says: top directory name)
+    spec_tree = project.get("specTree", [])
+    
+    # Check if there is a single top-level directory or valid root structure
+    root_dir = next((node for node in spec_tree if node.get("type") == "directory"), None)
+    has_root_dir = root_dir is not None
+    change_id = root_dir.get("name") if root_dir else None
+    
+    # Fallback to zip filename if no root directory found
+    if not change_id:
+        openspec_filename = project.get("openspecFile", {}).get("name", "change")
+        if openspec_filename.lower().endswith('.zip'):
+             change_id = openspec_filename[:-4]
+        else:
+             change_id = openspec_filename
+        
+        # Sanitize fallback ID
+        change_id = _SANITIZE_RE_ID.sub('-', change_id)
+    
+    # Logic: if zip has root dir, path is 'RootDir/file'. Target: 'openspec/changes/RootDir/file'
+    # If zip is flat, path is 'file'. Target: 'openspec/changes/ZipName/file'
+    prefix = "openspec/changes/" if has_root_dir else f"openspec/changes/{change_id}/"
+    
+    plan = []
+    pushable_types = {"specification", "change", "file"}
+    stack = list(reversed(spec_tree))
+    while stack:
+        node = stack.pop()
+        # Include specifications and change files
+        if node.get("type") in pushable_types:
+            plan.append((prefix + node["path"].lstrip('/'), node))
+        if node.get("children"):
+            stack.extend(reversed(node["children"]))
+    
+    project["_pushCache"] = (revision, change_id, plan)
+    return change_id, plan
+
+
+def prepare_push_files(project: Dict[str, Any]) -> tuple[str, list]:
+    """Derive the change ID and the OpenSpec files to push."""
+    change_id, plan = push_plan(project)
+    
+    files_to_push = []
+    # Not yet decoded specs, grouped by upload: zip digest -> [(file, node, contentRef)]
+    unread: Dict[str, list] = {}
+    for path, node in plan:
+        file = {"path": path, "content": node.get("content", "")}
+        files_to_push.append(file)
+        content_ref = node.get("contentRef")
+        if content_ref:
+            unread.setdefault(content_ref["zipDigest"], []).append((file, node, content_ref))
+    
+    # Decode each upload's pending entries in one pass, without materializing them on the nodes
+    for zip_digest, pending in unread.items():
+        contents = openspec_service.read_entries(zip_digest, [ref["entry"] for _, _, ref in pending])
+        for file, node, content_ref in pending:
+            content = contents.get(content_ref["entry"])
+            if content is None:
+                mark_spec_unreadable(project, node, content_ref)
+            else:
+                file["content"] = content
+    
+    # Skip empty files
+    return change_id, [file for file in files_to_push if file["content"]]
+
+
+def public_project(project: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip internal (underscore-prefixed) caches from a project."""
+    return {key: value for key, value in project.items() if not key.startswith("_")}
+
+
 # ============================================
 # Health Check
 # ============================================
@@ -117,6 +355,7 @@ async def health_check():
 async def create_project(project: ProjectCreate):
     """Create a new OpenSpec project."""
     project_id = str(uuid4())
+    now = datetime.now().isoformat()
     
     project_data = {
         "id": project_id,
@@ -127,8 +366,8 @@ async def create_project(project: ProjectCreate):
         "isPrivate": project.isPrivate,
         "specTree": [],
         "currentSpec": None,
-        "createdAt": datetime.now().isoformat(),
-        "updatedAt": datetime.now().isoformat()
+        "createdAt": now,
+        "updatedAt": now
     }
     
     user_sessions[project_id] = project_data
@@ -147,14 +386,18 @@ async def create_project(project: ProjectCreate):
 
 
 @app.get("/api/openspec/projects/{project_id}")
-async def get_project(project_id: str):
+async def get_project(project_id: str, request: Request):
     """Get project information."""
     project = user_sessions.get(project_id)
     
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    return {"success": True, "project": project}
+    body, etag = project_json(project)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 # ============================================
@@ -172,39 +415,49 @@ async def upload_openspec(project_id: str, openspecFile: UploadFile = File(...))
     if not openspecFile.filename.lower().endswith('.zip'):
         raise HTTPException(status_code=400, detail="File must be a .zip file")
     
-    # Read file content
-    content = await openspecFile.read()
+    # Stream file to disk
+    zip_digest = await openspec_service.store_upload(openspecFile.file)
     
-    # Validate structure
-    validation = openspec_service.validate_structure(content)
-    print(f"DEBUG: Validation result for {openspecFile.filename}: {validation}")
+    # Validate structure before touching the project's current upload; a rejected
+    # blob is left unreferenced for the garbage collector
+    validation = await asyncio.to_thread(
+        openspec_service.validate_structure,
+        openspec_service.blob_path(zip_digest)
+    )
+    logger.debug("Validation result for %s: %s", openspecFile.filename, validation)
     
     if not validation.get("isValid"):
-        print(f"DEBUG: Validation failed: {validation}")
+        logger.debug("Validation failed: %s", validation)
         raise HTTPException(
             status_code=400,
             detail=f"Invalid OpenSpec structure. Found: {validation}"
         )
     
-    # Save file
-    file_path = await openspec_service.save_uploaded_file(
+    file_path = await asyncio.to_thread(
+        openspec_service.link_upload,
         project_id,
         openspecFile.filename,
-        content
+        zip_digest
     )
     
     # Extract content
-    spec_content = openspec_service.extract_content(content)
+    # Markdown is decoded lazily from the stored blob (see load_spec_content)
+    spec_content = await asyncio.to_thread(openspec_service.extract_content, file_path, zip_digest)
     
     # Update project
+    now = datetime.now().isoformat()
     project["openspecFile"] = {
         "name": openspecFile.filename,
         "path": file_path,
-        "uploadedAt": datetime.now().isoformat()
+        "zipDigest": zip_digest,
+        "uploadedAt": now
     }
     project["specTree"] = spec_content["specTree"]
+    project["_specIndex"] = build_spec_index(project["specTree"])
+    mark_spec_tree_changed(project)
     project["currentSpec"] = spec_content.get("rootSpec")
-    project["updatedAt"] = datetime.now().isoformat()
+    project["updatedAt"] = now
+    user_sessions[project_id] = project  # refresh TTL
     
     return {
         "success": True,
@@ -225,12 +478,26 @@ async def get_specification(project_id: str, spec_id: str):
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    spec = find_spec_in_tree(project.get("specTree", []), spec_id)
+    spec = find_spec(project, spec_id)
     
     if not spec:
         raise HTTPException(status_code=404, detail="Specification not found")
     
-    return {"success": True, "spec": spec}
+    return {"success": True, "spec": await load_spec_content(project, spec)}
+
+
+@app.get("/api/openspec/specs/{zip_digest}/content")
+async def stream_spec_content(zip_digest: str, entry: str):
+    """Stream the raw markdown of one entry of an uploaded OpenSpec zip."""
+    if not _ZIP_DIGEST_RE.fullmatch(zip_digest):
+        raise HTTPException(status_code=400, detail="Invalid zip digest")
+    
+    try:
+        chunks = await asyncio.to_thread(openspec_service.iter_entry, zip_digest, entry)
+    except (FileNotFoundError, KeyError):
+        raise HTTPException(status_code=404, detail="Specification content not found")
+    
+    return StreamingResponse(chunks, media_type="text/markdown; charset=utf-8")
 
 
 @app.put("/api/openspec/projects/{project_id}/specs/{spec_id}")
@@ -245,20 +512,27 @@ async def update_specification(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    updated = update_spec_in_tree(
-        project.get("specTree", []),
+    now = datetime.now().isoformat()
+    updated = update_spec(
+        project,
         spec_id,
         {
             "content": update.content,
             "suggestions": update.suggestions,
-            "updatedAt": datetime.now().isoformat()
+            "updatedAt": now
         }
     )
     
     if not updated:
         raise HTTPException(status_code=404, detail="Specification not found")
+    # Saved content supersedes the uploaded entry (and any decode error)
+    spec = find_spec(project, spec_id)
+    spec.pop("contentRef", None)
+    spec.pop("error", None)
     
-    project["updatedAt"] = datetime.now().isoformat()
+    mark_spec_tree_changed(project)
+    project["updatedAt"] = now
+    user_sessions[project_id] = project  # refresh TTL
     
     return {"success": True, "message": "Specification updated successfully"}
 
@@ -279,10 +553,11 @@ async def generate_suggestions(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    spec = find_spec_in_tree(project.get("specTree", []), spec_id)
+    spec = find_spec(project, spec_id)
     
     if not spec:
         raise HTTPException(status_code=404, detail="Specification not found")
+    await load_spec_content(project, spec)
     
     # Generate suggestions
     suggestions = await anthropic_service.generate_suggestions(
@@ -290,8 +565,11 @@ async def generate_suggestions(
         project.get("projectName", "")
     )
     
-    # Update spec with suggestions
-    update_spec_in_tree(project.get("specTree", []), spec_id, {"suggestions": suggestions})
+    # Update spec with suggestions (spec is the node in the tree, mutate it in place)
+    spec["suggestions"] = suggestions
+    project["updatedAt"] = datetime.now().isoformat()
+    user_sessions[project_id] = project  # refresh TTL
+    invalidate_project_json(project)
     
     return {"success": True, "suggestions": suggestions}
 
@@ -306,94 +584,56 @@ async def run_code_generation(task_id: str, project: Dict[str, Any], branch_name
     
     try:
         # Step 1: Create branch and Prepare Environment
-        task["status"] = TaskStatus(
-            step="creating_branch",
-            message="Creating feature branch and syncing files...",
-            completed=False
-        ).model_dump()
+        task["status"] = {
+            "step": "creating_branch",
+            "message": "Creating feature branch and syncing files...",
+            "completed": False,
+            "error": False
+        }
         task["updatedAt"] = datetime.now().isoformat()
         
         # 1a. Create Branch
-        try:
-            await github_client.create_branch(
-                project["owner"],
-                project["repository"],
-                branch_name,
-                "main"
-            )
-        except Exception as e:
-            print(f"Branch may already exist, continuing... {str(e)}")
-        
-        # 1b. Push OpenSpec files to the new branch
-        # Determine Change ID from specTree (User says: top directory name)
-        spec_tree = project.get("specTree", [])
-        change_id = None
-        has_root_dir = False
-        
-        # Check if there is a single top-level directory or valid root structure
-        for node in spec_tree:
-            if node.get("type") == "directory":
-                change_id = node.get("name")
-                has_root_dir = True
-                break
-        
-        # Fallback to zip filename if no root directory found
-        if not change_id:
-            openspec_filename = project.get("openspecFile", {}).get("name", "change")
-            if openspec_filename.lower().endswith('.zip'):
-                 change_id = openspec_filename[:-4]
-            else:
-                 change_id = openspec_filename
-            
-            # Sanitize fallback ID
-            import re
-            change_id = re.sub(r'[^a-zA-Z0-9-_]', '-', change_id)
+        async def ensure_branch():
+            try:
+                await github_client.create_branch(
+                    project["owner"],
+                    project["repository"],
+                    branch_name,
+                    "main"
+                )
+            except Exception as e:
+                logger.info("Branch may already exist, continuing... %s", e)
         
-        files_to_push = []
+        # 1b. Collect OpenSpec files in a worker thread while the branch is created
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(ensure_branch())
+                files_task = tg.create_task(asyncio.to_thread(prepare_push_files, project))
+        except ExceptionGroup as eg:
+            # ensure_branch swallows its errors, so this is the push-file failure;
+            # surface it rather than "unhandled errors in a TaskGroup"
+            raise eg.exceptions[0] from None
+        change_id, files_to_push = files_task.result()
         
-        def collect_specs(nodes):
-            result = []
-            for node in nodes:
-                # Include specifications and change files, skip directories if they are empty
-                if node.get("type") in ["specification", "change", "file"] and node.get("content"):
-                    # Logic: if zip has root dir, path is 'RootDir/file'. Target: 'openspec/changes/RootDir/file'
-                    # If zip is flat, path is 'file'. Target: 'openspec/changes/ZipName/file'
-                    
-                    rel_path = node["path"].lstrip('/')
-                    
-                    if has_root_dir:
-                        # Path already includes the change_id (root dir name)
-                        target_path = f"openspec/changes/{rel_path}"
-                    else:
-                        # Path doesn't include ID, prepend it
-                        target_path = f"openspec/changes/{change_id}/{rel_path}"
-                    
-                    result.append({
-                        "path": target_path,
-                        "content": node["content"]
-                    })
-                if node.get("children"):
-                    result.extend(collect_specs(node["children"]))
-            return result
-            
-        files_to_push = collect_specs(spec_tree)
-                
-        if files_to_push:
+        # Push in bounded batches; each batch is one commit on the branch, so
+        # they go out sequentially to keep the branch head fast-forward only
+        for start in range(0, len(files_to_push), PUSH_BATCH_SIZE):
             await github_client.push_changes(
                 project["owner"],
                 project["repository"],
                 f"Sync OpenSpec files for change {change_id}",
-                files_to_push,
+                files_to_push[start:start + PUSH_BATCH_SIZE],
                 branch_name,
                 branch_name
             )
 
         # Step 2: Trigger Claude Task
-        task["status"] = TaskStatus(
-            step="generating_code",
-            message="Queuing Agent Task...",
-            completed=False
-        ).model_dump()
+        task["status"] = {
+            "step": "generating_code",
+            "message": "Queuing Agent Task...",
+            "completed": False,
+            "error": False
+        }
         task["updatedAt"] = datetime.now().isoformat()
         
         # User requirement: repoUrl must include the branch path
@@ -412,9 +652,13 @@ async def run_code_generation(task_id: str, project: Dict[str, Any], branch_name
         )
         agent_task_id = agent_task.get("taskId")
         
-        # Step 3: Poll Status
+        # Step 3: Poll Status (exponential backoff, reset whenever the status changes)
+        delay = POLL_MIN_DELAY
+        last_status = None
         while True:
-            await asyncio.sleep(5) # Poll every 5s
+            await asyncio.sleep(delay)
+            task_manager[task_id] = task  # refresh TTL while the agent is running
+            status = last_status
             
             try:
                 status_resp = await claude_task_client.get_task_status(agent_task_id)
@@ -425,11 +669,12 @@ async def run_code_generation(task_id: str, project: Dict[str, Any], branch_name
                     result_summary = status_resp.get("result", "Implementation completed.")
                     # Truncate summary for display if needed
                     
-                    task["status"] = TaskStatus(
-                        step="completed",
-                        message=f"Agent Finished: {result_summary[:200]}...",
-                        completed=True
-                    ).model_dump()
+                    task["status"] = {
+                        "step": "completed",
+                        "message": f"Agent Finished: {result_summary[:200]}...",
+                        "completed": True,
+                        "error": False
+                    }
                     task["updatedAt"] = datetime.now().isoformat()
                     break
                     
@@ -446,16 +691,18 @@ async def run_code_generation(task_id: str, project: Dict[str, Any], branch_name
                     task["updatedAt"] = datetime.now().isoformat()
             
             except Exception as inner_e:
-                print(f"Error polling task status: {inner_e}")
-                pass
+                logger.warning("Error polling task status: %s", inner_e)
+            
+            delay = POLL_MIN_DELAY if status != last_status else min(delay * 2, POLL_MAX_DELAY)
+            last_status = status
                 
     except Exception as e:
-        task["status"] = TaskStatus(
-            step="error",
-            message=str(e),
-            completed=True,
-            error=True
-        ).model_dump()
+        task["status"] = {
+            "step": "error",
+            "message": str(e),
+            "completed": True,
+            "error": True
+        }
         task["updatedAt"] = datetime.now().isoformat()
 
 
@@ -472,17 +719,19 @@ async def generate_codebase(
         raise HTTPException(status_code=404, detail="Project not found")
     
     task_id = str(uuid4())
+    now = datetime.now().isoformat()
     
     task_manager[task_id] = {
         "id": task_id,
         "projectId": project_id,
-        "status": TaskStatus(
-            step="initializing",
-            message="Starting code generation...",
-            completed=False
-        ).model_dump(),
-        "createdAt": datetime.now().isoformat(),
-        "updatedAt": datetime.now().isoformat()
+        "status": {
+            "step": "initializing",
+            "message": "Starting code generation...",
+            "completed": False,
+            "error": False
+        },
+        "createdAt": now,
+        "updatedAt": now
     }
     
     # Run in background
@@ -512,8 +761,6 @@ async def get_suggested_branch(project_id: str):
     project = user_sessions.get(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-        
-    import re
     
     base_name = "openspec-implementation"
     if project.get("openspecFile") and project["openspecFile"].get("name"):
@@ -523,7 +770,7 @@ async def get_suggested_branch(project_id: str):
             raw_name = raw_name[:-4]
         
         # Replace non-alphanumeric with hyphen
-        base_name = re.sub(r'[^a-zA-Z0-9]', '-', raw_name)
+        base_name = _SANITIZE_RE.sub('-', raw_name)
     
     # Add timestamp
     timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
@@ -560,10 +807,21 @@ async def create_pull_request(project_id: str, request: PullRequestCreate):
             "message": "Pull request created successfully"
         }
         
+    except GitHubNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except GitHubRateLimit as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=settings.PORT)
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=settings.PORT,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
+    )
@@ -1,6 +1,6 @@
 """Pydantic models for request/response validation."""
 from pydantic import BaseModel, Field
-from typing import Optional, List, Any
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from uuid import UUID, uuid4
 
@@ -35,6 +35,10 @@ class Specification(BaseModel):
     path: str
     type: str  # 'specification' or 'change'
     content: str = ""
+    # {"zipDigest", "entry"} while the content is still undecoded in the upload
+    contentRef: Optional[Dict[str, str]] = None
+    # Set when the uploaded markdown could not be decoded
+    error: Optional[str] = None
     children: List["Specification"] = Field(default_factory=list)
     suggestions: List[Any] = Field(default_factory=list)
 
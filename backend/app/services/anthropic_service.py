@@ -1,16 +1,44 @@
 """Anthropic Claude API service for AI suggestions."""
 import json
-import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from uuid import uuid4
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
+
+
+def _extract_json_array(text: str) -> Optional[str]:
+    """Return the first balanced JSON array in text, if any."""
+    start = text.find('[')
+    if start == -1:
+        return None
+    
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
 
 
 class AnthropicService:
     """Service for generating AI suggestions using Claude."""
     
     def __init__(self, api_key: str):
-        self.client = Anthropic(api_key=api_key)
+        self.client = AsyncAnthropic(api_key=api_key)
         self.model = "claude-sonnet-4-20250514"
     
     async def generate_suggestions(
@@ -20,7 +48,7 @@ class AnthropicService:
     ) -> List[Dict[str, str]]:
         """Generate AI suggestions for a specification."""
         try:
-            message = self.client.messages.create(
+            message = await self.client.messages.create(
                 model=self.model,
                 max_tokens=2048,
                 messages=[
@@ -46,9 +74,9 @@ Respond with a JSON array of suggestions, each with "id" and "content" fields.""
             response_text = message.content[0].text
             
             # Try to extract JSON from the response
-            json_match = re.search(r'\[[\s\S]*\]', response_text)
-            if json_match:
-                suggestions = json.loads(json_match.group(0))
+            json_array = _extract_json_array(response_text)
+            if json_array:
+                suggestions = json.loads(json_array)
                 # Ensure each suggestion has an ID
                 for suggestion in suggestions:
                     if 'id' not in suggestion:
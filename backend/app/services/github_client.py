@@ -1,14 +1,174 @@
 """GitHub API Client - proxies operations to external code-generation-platform."""
+import asyncio
+import functools
+import logging
+import tempfile
+import time
 import httpx
-from typing import List, Dict, Any, Optional
+import orjson
+from cachetools import LRUCache
+from typing import List, Dict, Any, Optional, BinaryIO, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# Repository downloads: read size per chunk, and in-memory limit before spilling to disk
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_SPOOL_SIZE = 8 * 1024 * 1024
+
+# Shared HTTP/2 clients, one per proxy base URL; all calls to a proxy multiplex
+# over one pooled connection
+_CLIENTS: Dict[str, httpx.AsyncClient] = {}
+
+
+def get_shared_client(base_url: str) -> httpx.AsyncClient:
+    """Return the module-wide client for base_url, creating it on first use."""
+    base_url = base_url.rstrip("/")
+    client = _CLIENTS.get(base_url)
+    if client is None or client.is_closed:
+        client = _CLIENTS[base_url] = httpx.AsyncClient(
+            base_url=base_url,
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=100)
+        )
+    return client
+
+
+async def close_shared_client():
+    """Close every module-wide client (application shutdown)."""
+    clients = list(_CLIENTS.values())
+    _CLIENTS.clear()
+    for client in clients:
+        await client.aclose()
+
+
+class GitHubProxyError(Exception):
+    """A proxied GitHub operation failed.
+    
+    status_code is None when no HTTP response was received (timeout, connection error).
+    """
+    
+    def __init__(self, op: str, status_code: Optional[int] = None, body: Optional[str] = None, detail: str = ""):
+        self.op = op
+        self.status_code = status_code
+        self.body = body
+        super().__init__(f"Failed to {op}: {detail or status_code}")
+
+
+class GitHubNotFound(GitHubProxyError):
+    """The proxied resource does not exist (404)."""
+
+
+class GitHubRateLimit(GitHubProxyError):
+    """The proxy rejected the call for rate limiting or quota (403/429)."""
+
+
+def _proxy_error(op: str, error: httpx.HTTPError) -> GitHubProxyError:
+    """Map an httpx error to the matching GitHubProxyError subclass."""
+    if not isinstance(error, httpx.HTTPStatusError):
+        return GitHubProxyError(op, detail=str(error))
+    
+    status_code = error.response.status_code
+    try:
+        body = error.response.text
+    except httpx.ResponseNotRead:
+        # Streaming responses (download_repository) are not buffered
+        body = None
+    
+    if status_code == 404:
+        error_class = GitHubNotFound
+    elif status_code in (403, 429):
+        error_class = GitHubRateLimit
+    else:
+        error_class = GitHubProxyError
+    return error_class(op, status_code, body, str(error))
+
+
+def _timed(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Log the duration and outcome of a proxy call, labelled by its op (or method name)."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        op = kwargs.get("op") or func.__name__.replace("_", " ")
+        start = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except GitHubProxyError as e:
+            logger.warning("%s failed after %.1f ms (status %s)", op, (time.perf_counter() - start) * 1000, e.status_code)
+            raise
+        logger.debug("%s took %.1f ms", op, (time.perf_counter() - start) * 1000)
+        return result
+    return wrapper
+
+
+def _json(response: httpx.Response) -> Any:
+    """Decode a JSON response body straight from bytes with orjson."""
+    return orjson.loads(response.content)
 
 
 class GitHubApiClient:
     """Client for GitHub operations via external API proxy."""
     
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, client: Optional[httpx.AsyncClient] = None):
         self.base_url = base_url.rstrip("/")
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.client = client or get_shared_client(self.base_url)
+        # (path, params) -> (etag, body) for conditional GETs
+        self._etag_cache: LRUCache = LRUCache(maxsize=512)
+        # (path, params) -> in-flight GET shared by concurrent callers
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+    
+    @_timed
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        op: str,
+        json: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """Send one proxy request and decode its JSON body, raising GitHubProxyError on failure."""
+        try:
+            response = await self.client.request(method, path, json=json, params=params)
+            response.raise_for_status()
+            return _json(response)
+        except httpx.HTTPError as e:
+            raise _proxy_error(op, e) from e
+    
+    @_timed
+    async def _get_with_etag(self, path: str, params: Dict[str, Any], *, op: str) -> Dict[str, Any]:
+        """GET a JSON resource, revalidating any cached copy with If-None-Match.
+        
+        Concurrent calls for the same (path, params) share one upstream request.
+        """
+        key = (path, frozenset(params.items()))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._conditional_get(key, path, params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        try:
+            # Shield so one caller's cancellation doesn't cancel the others' request
+            return await asyncio.shield(task)
+        except httpx.HTTPError as e:
+            raise _proxy_error(op, e) from e
+    
+    async def _conditional_get(self, key: tuple, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Perform the conditional GET and refresh the ETag cache."""
+        cached = self._etag_cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else None
+        
+        response = await self.client.get(path, params=params, headers=headers)
+        if cached and response.status_code == 304:
+            return cached[1]
+        response.raise_for_status()
+        
+        body = _json(response)
+        etag = response.headers.get("ETag")
+        if etag:
+            self._etag_cache[key] = (etag, body)
+        else:
+            self._etag_cache.pop(key, None)
+        return body
     
     async def create_repository(
         self,
@@ -18,20 +178,12 @@ class GitHubApiClient:
         is_private: bool = False
     ) -> Dict[str, Any]:
         """Create a new GitHub repository."""
-        try:
-            response = await self.client.post(
-                f"{self.base_url}/create-repo",
-                json={
-                    "owner": owner,
-                    "name": name,
-                    "description": description,
-                    "isPrivate": is_private
-                }
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            raise Exception(f"Failed to create repository: {str(e)}")
+        return await self._request("POST", "/create-repo", op="create repository", json={
+            "owner": owner,
+            "name": name,
+            "description": description,
+            "isPrivate": is_private
+        })
     
     async def create_branch(
         self,
@@ -41,20 +193,12 @@ class GitHubApiClient:
         source_branch: str = "main"
     ) -> Dict[str, Any]:
         """Create a new branch."""
-        try:
-            response = await self.client.post(
-                f"{self.base_url}/create-branch",
-                json={
-                    "owner": owner,
-                    "repo": repo,
-                    "branchName": branch_name,
-                    "sourceBranch": source_branch
-                }
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            raise Exception(f"Failed to create branch: {str(e)}")
+        return await self._request("POST", "/create-branch", op="create branch", json={
+            "owner": owner,
+            "repo": repo,
+            "branchName": branch_name,
+            "sourceBranch": source_branch
+        })
     
     async def push_changes(
         self,
@@ -66,22 +210,14 @@ class GitHubApiClient:
         parent_branch: str = "main"
     ) -> Dict[str, Any]:
         """Push changes to a repository."""
-        try:
-            response = await self.client.post(
-                f"{self.base_url}/push-changes",
-                json={
-                    "owner": owner,
-                    "repo": repo,
-                    "commitMessage": commit_message,
-                    "files": files,
-                    "branch": branch,
-                    "parentBranch": parent_branch
-                }
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            raise Exception(f"Failed to push changes: {str(e)}")
+        return await self._request("POST", "/push-changes", op="push changes", json={
+            "owner": owner,
+            "repo": repo,
+            "commitMessage": commit_message,
+            "files": files,
+            "branch": branch,
+            "parentBranch": parent_branch
+        })
     
     async def create_pull_request(
         self,
@@ -93,34 +229,18 @@ class GitHubApiClient:
         base: str = "main"
     ) -> Dict[str, Any]:
         """Create a pull request."""
-        try:
-            response = await self.client.post(
-                f"{self.base_url}/create-pull-request",
-                json={
-                    "owner": owner,
-                    "repo": repo,
-                    "title": title,
-                    "body": body,
-                    "head": head,
-                    "base": base
-                }
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            raise Exception(f"Failed to create pull request: {str(e)}")
+        return await self._request("POST", "/create-pull-request", op="create pull request", json={
+            "owner": owner,
+            "repo": repo,
+            "title": title,
+            "body": body,
+            "head": head,
+            "base": base
+        })
     
     async def get_repository(self, owner: str, repo: str) -> Dict[str, Any]:
         """Get repository information."""
-        try:
-            response = await self.client.get(
-                f"{self.base_url}/repository",
-                params={"owner": owner, "repo": repo}
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            raise Exception(f"Failed to get repository: {str(e)}")
+        return await self._get_with_etag("/repository", {"owner": owner, "repo": repo}, op="get repository")
     
     async def get_contents(
         self,
@@ -130,57 +250,90 @@ class GitHubApiClient:
         ref: str = "main"
     ) -> Dict[str, Any]:
         """Get repository contents."""
-        try:
-            response = await self.client.get(
-                f"{self.base_url}/contents",
-                params={"owner": owner, "repo": repo, "path": path, "ref": ref}
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            raise Exception(f"Failed to get contents: {str(e)}")
+        return await self._get_with_etag(
+            "/contents",
+            {"owner": owner, "repo": repo, "path": path, "ref": ref},
+            op="get contents"
+        )
     
+    @_timed
     async def download_repository(
         self,
         owner: str,
         repo: str,
-        ref: str = "main"
-    ) -> bytes:
-        """Download repository as zip buffer."""
+        ref: str = "main",
+        sink: Optional[BinaryIO] = None
+    ) -> BinaryIO:
+        """Download repository zip, streaming it into sink.
+        
+        Without a sink the zip is spooled to a temporary file (in memory up to
+        DOWNLOAD_SPOOL_SIZE, on disk beyond) and returned rewound to the start.
+        """
+        own_sink = sink is None
+        if own_sink:
+            sink = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_SIZE)
         try:
-            response = await self.client.get(
-                f"{self.base_url}/download-repo",
+            async with self.client.stream(
+                "GET",
+                "/download-repo",
                 params={"owner": owner, "repo": repo, "ref": ref}
-            )
-            response.raise_for_status()
-            return response.content
+            ) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    sink.write(chunk)
         except httpx.HTTPError as e:
-            raise Exception(f"Failed to download repository: {str(e)}")
+            if own_sink:
+                sink.close()
+            raise _proxy_error("download repository", e) from e
+        
+        if own_sink:
+            sink.seek(0)
+        return sink
     
     async def get_branches(self, owner: str, repo: str) -> Dict[str, Any]:
         """Get branches."""
-        try:
-            response = await self.client.get(
-                f"{self.base_url}/branches",
-                params={"owner": owner, "repo": repo}
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            raise Exception(f"Failed to get branches: {str(e)}")
+        return await self._get_with_etag("/branches", {"owner": owner, "repo": repo}, op="get branches")
     
     async def check_installation_status(self, owner: str) -> Dict[str, Any]:
         """Check installation status."""
-        try:
-            response = await self.client.get(
-                f"{self.base_url}/user-installation-status",
-                params={"owner": owner}
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            raise Exception(f"Failed to check installation status: {str(e)}")
+        return await self._get_with_etag(
+            "/user-installation-status",
+            {"owner": owner},
+            op="check installation status"
+        )
+    
+    async def get_repo_overview(
+        self,
+        owner: str,
+        repo: str,
+        path: str = "",
+        ref: str = "main"
+    ) -> Dict[str, Any]:
+        """Fetch repository info, branches and contents concurrently.
+        
+        The three GETs are multiplexed over the shared HTTP/2 connection, so the
+        overview costs roughly one round-trip. A failed lookup leaves its field
+        as None and records the message under "errors".
+        """
+        results = await asyncio.gather(
+            self.get_repository(owner, repo),
+            self.get_branches(owner, repo),
+            self.get_contents(owner, repo, path, ref),
+            return_exceptions=True
+        )
+        
+        overview: Dict[str, Any] = {"errors": {}}
+        for field, result in zip(("repository", "branches", "contents"), results):
+            if isinstance(result, Exception):
+                overview[field] = None
+                overview["errors"][field] = str(result)
+            else:
+                overview[field] = result
+        return overview
     
     async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
+        """Release this client.
+        
+        A no-op: the shared client may serve other instances and is closed by
+        close_shared_client() at shutdown, and injected clients belong to the caller.
+        """
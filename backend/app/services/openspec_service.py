@@ -1,11 +1,113 @@
 """OpenSpec file handling service."""
+import asyncio
+import errno
+import hashlib
 import zipfile
 import io
+import itertools
+import logging
 import os
+import re
+import shutil
+import sys
+import time
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, BinaryIO, Union, Iterable, Iterator
 from uuid import uuid4
 
+logger = logging.getLogger(__name__)
+
+# validate_structure markers, matched against newline-joined entry names
+_OPENSPEC_DIR_RE = re.compile(r'^openspec|openspec/', re.IGNORECASE | re.MULTILINE)
+_CHANGES_DIR_RE = re.compile(r'changes/', re.IGNORECASE)
+_SPECS_DIR_RE = re.compile(r'specs/', re.IGNORECASE)
+_PROJECT_MD_RE = re.compile(r'project\.md|\.md$', re.IGNORECASE | re.MULTILINE)
+
+# Shared empty placeholders for tree nodes (serialized as [])
+_NO_CHILDREN: tuple = ()
+_NO_SUGGESTIONS: tuple = ()
+
+ZipSource = Union[str, Path, bytes, bytearray, BinaryIO]
+
+# Link errors that mean "not supported here" and justify the next fallback
+_LINK_UNSUPPORTED_ERRNOS = {errno.EPERM, errno.EXDEV, errno.EOPNOTSUPP}
+
+
+def _open_zip(src: ZipSource) -> zipfile.ZipFile:
+    """Open a zip from a path, raw bytes or a seekable binary stream."""
+    if isinstance(src, (bytes, bytearray)):
+        return zipfile.ZipFile(io.BytesIO(src))
+    if isinstance(src, (str, Path)):
+        return zipfile.ZipFile(src)
+    if hasattr(src, "read") and hasattr(src, "seek"):
+        return zipfile.ZipFile(src)
+    raise TypeError(f"Unsupported zip source: {type(src).__name__}")
+
+
+def _read_markdown(source: ZipSource, entries: List[str]) -> Dict[str, str]:
+    """Read and UTF-8 decode the given entries, skipping (and logging) unreadable ones."""
+    results = {}
+    with _open_zip(source) as zip_file:
+        for entry in entries:
+            try:
+                with zip_file.open(entry) as fh:
+                    results[entry] = fh.read().decode('utf-8')
+            except Exception as e:
+                logger.warning("Error reading %s: %s", entry, e)
+    return results
+
+
+def _copy_to_path(file_obj: BinaryIO, file_path: Path) -> None:
+    """Copy a binary stream to file_path in 1 MiB chunks."""
+    with open(file_path, 'wb') as f:
+        shutil.copyfileobj(file_obj, f, length=1 << 20)
+
+
+def _hash_stream(file_obj: BinaryIO) -> str:
+    """BLAKE2b digest of a seekable stream, leaving it rewound for the copy."""
+    digest = hashlib.blake2b(digest_size=16)
+    while chunk := file_obj.read(1 << 20):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def _link_unsupported(error: BaseException) -> bool:
+    """Whether a link failed because the OS/filesystem can't create one (vs. a real error)."""
+    if isinstance(error, NotImplementedError):
+        return True
+    return (
+        error.errno in _LINK_UNSUPPORTED_ERRNOS
+        # ERROR_PRIVILEGE_NOT_HELD: symlinks need admin/developer mode on Windows
+        or getattr(error, "winerror", None) == 1314
+    )
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    """Point target at source: a symlink, else a hard link, else a copy (Windows).
+    
+    The link is built under a temporary name and moved over target with
+    os.replace, so an existing target is swapped atomically rather than
+    written through.
+    """
+    temp_path = target.with_name(f".{target.name}.{uuid4().hex}.tmp")
+    try:
+        try:
+            os.symlink(source.resolve(), temp_path)
+        except (OSError, NotImplementedError) as e:
+            if not _link_unsupported(e):
+                raise
+            try:
+                os.link(source, temp_path)
+            except OSError as e:
+                if not _link_unsupported(e):
+                    raise
+                shutil.copyfile(source, temp_path)
+        os.replace(temp_path, target)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
 
 class OpenSpecService:
     """Service for handling OpenSpec file operations."""
@@ -13,35 +115,26 @@ class OpenSpecService:
     def __init__(self, temp_dir: str = "./temp"):
         self.temp_dir = Path(temp_dir)
         self.temp_dir.mkdir(parents=True, exist_ok=True)
+        self.blobs_dir = self.temp_dir / "blobs"
     
-    def validate_structure(self, file_content: bytes) -> Dict[str, Any]:
+    def validate_structure(self, source: ZipSource) -> Dict[str, Any]:
         """Validate OpenSpec zip structure."""
         try:
-            with zipfile.ZipFile(io.BytesIO(file_content)) as zip_file:
-                entries = zip_file.namelist()
+            with _open_zip(source) as zip_file:
+                # One C-level scan per marker over all entry names, instead of
+                # lowercasing and substring-testing every entry in Python
+                names = "\n".join(zip_file.namelist())
+                has_openspec_dir = _OPENSPEC_DIR_RE.search(names) is not None
+                has_changes_dir = _CHANGES_DIR_RE.search(names) is not None
+                has_specs_dir = _SPECS_DIR_RE.search(names) is not None
+                # Any markdown file counts as project metadata, to be permissive
+                has_project_md = _PROJECT_MD_RE.search(names) is not None
                 
-                has_openspec_dir = False
-                has_changes_dir = False
-                has_specs_dir = False
-                has_project_md = False
-                
-                for entry_path in entries:
-                    entry_lower = entry_path.lower()
-                    if 'openspec/' in entry_lower or entry_lower.startswith('openspec'):
-                        has_openspec_dir = True
-                    if 'changes/' in entry_lower:
-                        has_changes_dir = True
-                    if 'specs/' in entry_lower:
-                        has_specs_dir = True
-                    if 'project.md' in entry_lower:
-                        has_project_md = True
-                    
-                    # Also check for any markdown file to be permissive
-                    if entry_lower.endswith('.md'):
-                        has_project_md = True  # Treat as having project metadata for validation purposes
-                
-                # Debug print
-                print(f"Validation keys: openspec={has_openspec_dir}, changes={has_changes_dir}, specs={has_specs_dir}, project={has_project_md}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "Validation keys: openspec=%s changes=%s specs=%s project=%s",
+                        has_openspec_dir, has_changes_dir, has_specs_dir, has_project_md
+                    )
                 
                 return {
                     "isValid": has_openspec_dir or has_changes_dir or has_project_md or has_specs_dir,
@@ -58,75 +151,87 @@ class OpenSpecService:
                 "errors": [str(e)]
             }
     
-    def extract_content(self, file_content: bytes) -> Dict[str, Any]:
-        """Extract OpenSpec content from zip file and build tree structure."""
+    def extract_content(self, source: ZipSource, zip_digest: str) -> Dict[str, Any]:
+        """Extract OpenSpec content from zip file and build tree structure.
+        
+        Markdown is not decoded up front: each spec node gets a "contentRef"
+        ({"zipDigest", "entry"}) into the stored blob that read_entries()
+        resolves on demand.
+        """
         spec_tree = []
         
         try:
-            with zipfile.ZipFile(io.BytesIO(file_content)) as zip_file:
-                # Helper to find or create a node in the tree
-                def find_or_create_node(tree: List[Dict], path_parts: List[str], full_path: str) -> Dict:
-                    current_level = tree
-                    current_path = ""
+            with _open_zip(source) as zip_file:
+                # Only process markdown files (skipping directories and OS metadata),
+                # but let the tree builder handle structure
+                infos = [
+                    info for info in zip_file.infolist()
+                    if not info.is_dir()
+                    and info.filename.endswith('.md')
+                    and '__MACOSX' not in info.filename
+                    and not info.filename.startswith('.')
+                ]
+            entry_paths = sorted(info.filename for info in infos)
+            
+            # Nodes already in the tree, keyed by their cumulative path
+            index: Dict[str, Dict] = {}
+            
+            # Node IDs: one random prefix per upload plus a counter, instead of a uuid4 per node
+            id_prefix = uuid4().hex[:8]
+            next_id = itertools.count().__next__
+            
+            # Helper to find or create a node in the tree
+            def find_or_create_node(tree: List[Dict], path_parts: List[str], full_path: str) -> Dict:
+                current_level = tree
+                # Cumulative paths ("a", "a/b", ...); zip entry names are always POSIX
+                prefixes = itertools.accumulate(path_parts, lambda prefix, part: f"{prefix}/{part}")
+                last = len(path_parts) - 1
+                
+                for i, (part, current_path) in enumerate(zip(path_parts, prefixes)):
+                    is_file = (i == last)
+                    
+                    # Find existing node
+                    found = index.get(current_path)
                     
-                    for i, part in enumerate(path_parts):
-                        is_file = (i == len(path_parts) - 1)
-                        current_path = os.path.join(current_path, part).replace("\\", "/")
+                    if found:
+                        if is_file:
+                            return found
+                        if found["children"] is _NO_CHILDREN:
+                            found["children"] = []
+                        current_level = found["children"]
+                    else:
+                        # Create new node; leaves share immutable empty placeholders,
+                        # since suggestions and children are replaced, never appended to
+                        new_node = {
+                            "id": f"{id_prefix}-{next_id()}",
+                            "name": sys.intern(part),
+                            "path": full_path if is_file else current_path,
+                            "type": "file" if is_file else "directory",
+                            "content": "",
+                            "children": _NO_CHILDREN if is_file else [],
+                            "suggestions": _NO_SUGGESTIONS
+                        }
                         
-                        # Find existing node
-                        found = None
-                        for node in current_level:
-                            if node["name"] == part:
-                                found = node
-                                break
+                        # Identify specific folder types for icon coloring
+                        if not is_file:
+                            if part.lower() == "changes":
+                                new_node["type"] = "change"
                         
-                        if found:
-                            if is_file:
-                                return found
-                            current_level = found["children"]
+                        current_level.append(new_node)
+                        index[current_path] = new_node
+                        
+                        if not is_file:
+                            current_level = new_node["children"]
                         else:
-                            # Create new node
-                            new_node = {
-                                "id": str(uuid4()),
-                                "name": part,
-                                "path": full_path if is_file else current_path,
-                                "type": "file" if is_file else "directory",
-                                "content": "",
-                                "children": [],
-                                "suggestions": []
-                            }
-                            
-                            # Identify specific folder types for icon coloring
-                            if not is_file:
-                                if part.lower() == "changes":
-                                    new_node["type"] = "change"
-                            
-                            current_level.append(new_node)
-                            
-                            if not is_file:
-                                current_level = new_node["children"]
-                            else:
-                                return new_node
-
-                for entry_path in sorted(zip_file.namelist()):
-                    # Skip skipped directories/files
-                    if entry_path.endswith('/') or '__MACOSX' in entry_path or entry_path.startswith('.'):
-                        continue
-                    
-                    # Normalize path
-                    path_parts = entry_path.strip('/').split('/')
-                    file_name = path_parts[-1]
-                    
-                    # Only process markdown files, but let the tree builder handle structure
-                    if file_name.endswith('.md'):
-                        try:
-                            content = zip_file.read(entry_path).decode('utf-8')
-                            node = find_or_create_node(spec_tree, path_parts, entry_path)
-                            node["content"] = content
-                            node["type"] = "specification" # Mark files as specifications
-                        except Exception as e:
-                            print(f"Error reading {entry_path}: {e}")
-                            continue
+                            return new_node
+
+            for entry_path in entry_paths:
+                # Normalize path
+                path_parts = entry_path.strip('/').split('/')
+                
+                node = find_or_create_node(spec_tree, path_parts, entry_path)
+                node["contentRef"] = {"zipDigest": zip_digest, "entry": entry_path}
+                node["type"] = "specification" # Mark files as specifications
 
             return {
                 "specTree": spec_tree,
@@ -136,18 +241,107 @@ class OpenSpecService:
         except Exception as e:
             raise Exception(f"Failed to extract OpenSpec content: {str(e)}")
     
-    async def save_uploaded_file(
-        self,
-        project_id: str,
-        filename: str,
-        content: bytes
-    ) -> str:
-        """Save an uploaded file to the temp directory."""
+    def blob_path(self, zip_digest: str) -> Path:
+        """Location of a stored upload blob."""
+        return self.blobs_dir / zip_digest[:2] / zip_digest
+    
+    def read_entries(self, zip_digest: str, entries: List[str]) -> Dict[str, str]:
+        """Decode the given markdown entries of a stored upload in one pass.
+        
+        Entries that are missing or not valid UTF-8 are left out of the result;
+        a missing blob raises FileNotFoundError.
+        """
+        return _read_markdown(self.blob_path(zip_digest), entries)
+    
+    def iter_entry(self, zip_digest: str, entry: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Stream one entry of a stored upload.
+        
+        Raises FileNotFoundError / KeyError up front for an unknown blob or entry.
+        """
+        zip_file = zipfile.ZipFile(self.blob_path(zip_digest))
+        try:
+            info = zip_file.getinfo(entry)
+        except KeyError:
+            zip_file.close()
+            raise
+        
+        def chunks() -> Iterator[bytes]:
+            with zip_file, zip_file.open(info) as fh:
+                while chunk := fh.read(chunk_size):
+                    yield chunk
+        
+        return chunks()
+    
+    async def store_upload(self, file_obj: BinaryIO) -> str:
+        """Store an uploaded file by content hash and return its digest.
+        
+        Identical uploads share one blob under temp_dir/blobs, so a repeat upload
+        costs a hash pass instead of a full write.
+        """
+        digest = await asyncio.to_thread(_hash_stream, file_obj)
+        blob_path = self.blob_path(digest)
+        
+        if blob_path.exists():
+            # Restart the GC grace period until the caller links or references it
+            os.utime(blob_path)
+        else:
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            partial_path = blob_path.with_name(f"{digest}.{uuid4().hex}.part")
+            await asyncio.to_thread(_copy_to_path, file_obj, partial_path)
+            os.replace(partial_path, blob_path)
+        
+        return digest
+    
+    def link_upload(self, project_id: str, filename: str, zip_digest: str) -> str:
+        """Link a stored upload into the project directory; returns the project file path."""
         project_dir = self.temp_dir / project_id
         project_dir.mkdir(parents=True, exist_ok=True)
         
-        file_path = project_dir / filename
-        with open(file_path, 'wb') as f:
-            f.write(content)
+        # Client-supplied name: keep only the final component
+        file_path = project_dir / Path(filename).name
+        _link_or_copy(self.blob_path(zip_digest), file_path)
         
         return str(file_path)
+    
+    def collect_garbage(
+        self,
+        live_project_ids: Iterable[str] = (),
+        referenced_digests: Iterable[str] = (),
+        min_age_seconds: float = 3600.0
+    ) -> int:
+        """Delete upload files no live project uses; returns the number of blobs removed.
+        
+        Project directories not in live_project_ids are removed, and blobs not in
+        referenced_digests (the uploads live projects read their specs from).
+        Project links are not counted as references. Anything younger than
+        min_age_seconds is kept, so an upload between storing its blob and
+        recording its digest on the project is never collected.
+        """
+        live_project_ids = set(live_project_ids)
+        referenced_digests = set(referenced_digests)
+        cutoff = time.time() - min_age_seconds
+        
+        for project_dir in self.temp_dir.iterdir():
+            if project_dir == self.blobs_dir or project_dir.name in live_project_ids:
+                continue
+            try:
+                if not project_dir.is_dir() or project_dir.stat().st_mtime > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            shutil.rmtree(project_dir, ignore_errors=True)
+        
+        removed = 0
+        for blob_path in self.blobs_dir.glob("*/*"):
+            # In-progress writes (see store_upload) are not blobs yet
+            if blob_path.suffix == ".part" or blob_path.name in referenced_digests:
+                continue
+            try:
+                if blob_path.stat().st_mtime > cutoff:
+                    continue
+            except FileNotFoundError:
+                # Removed or renamed since the glob
+                continue
+            blob_path.unlink(missing_ok=True)
+            removed += 1
+        return removed
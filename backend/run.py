@@ -1,4 +1,5 @@
 """Entry point for running the FastAPI server."""
+import sys
 import uvicorn
 from app.config import get_settings
 
@@ -8,5 +9,8 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=settings.PORT,
-        reload=settings.DEBUG
+        reload=settings.DEBUG,
+        # uvloop is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
     )
@@ -140,7 +140,27 @@ export default function HomePage() {
 
     // Select specification
     const handleSelectSpec = async (specId: string) => {
-        const spec = findSpecInTree(specTree, specId);
+        let spec = findSpecInTree(specTree, specId);
+        if (spec?.error) {
+            alert(`Cannot open ${spec.name}: ${spec.error}`);
+            return;
+        }
+        if (spec?.contentRef) {
+            // Content is decoded on the backend on first access; never open the
+            // empty placeholder, or a save would overwrite the real spec
+            if (!projectId) return;
+            try {
+                const response = await api.getSpecification(projectId, specId);
+                if (!response.success) {
+                    alert(`Failed to load specification: ${response.error || 'Unknown error'}`);
+                    return;
+                }
+                spec = response.spec;
+            } catch (error: any) {
+                alert(`Failed to load specification: ${error.message}`);
+                return;
+            }
+        }
         if (spec) {
             setSelectedSpec(spec);
             setSuggestions(spec.suggestions || []);
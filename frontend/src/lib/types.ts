@@ -26,6 +26,10 @@ export interface Specification {
     path: string;
     type: 'specification' | 'change' | 'directory' | 'file';
     content: string;
+    // Set while the content is still undecoded in the uploaded zip
+    contentRef?: { zipDigest: string; entry: string };
+    // Set when the uploaded content could not be decoded
+    error?: string;
     children: Specification[];
     suggestions: Suggestion[];
 }